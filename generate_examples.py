@@ -4,34 +4,44 @@
 import sys
 sys.path.insert(0, "pmd")
 
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
 from topology import generate_topology
-from visualize_graph import visualize_graph
-from dungeon import generate_dungeon
+from visualize_graph import _use_agg, visualize_graph
+from dungeon import build_dungeon
 from render_ascii import render_ascii
 
 NUM_EXAMPLES = 10
 NUM_ROOMS = 7
 
 
+def _generate(i: int):
+    """Build example i in a worker process; returns (num, ascii_grid or None)."""
+    num = f"{i:02d}"
+
+    topology = generate_topology(NUM_ROOMS)
+    if topology is None:
+        return num, None
+
+    # Graph PNG and ASCII text of the same dungeon
+    visualize_graph(topology, f"output/graph/dungeon_{num}.png")
+    return num, render_ascii(build_dungeon(topology))
+
+
 def main():
     print(f"Generating {NUM_EXAMPLES} dungeon examples ({NUM_ROOMS} rooms each)...")
     print()
 
-    for i in range(1, NUM_EXAMPLES + 1):
-        num = f"{i:02d}"
-
-        # Generate graph PNG (topology only)
-        topology = generate_topology(NUM_ROOMS)
-        if topology:
-            visualize_graph(topology, f"output/graph/dungeon_{num}.png")
-
-        # Generate ASCII text (full pipeline)
-        dungeon = generate_dungeon(NUM_ROOMS)
-        if dungeon:
-            ascii_grid = render_ascii(dungeon)
-            with open(f"output/ascii/dungeon_{num}.txt", "w") as f:
-                f.write(ascii_grid)
-            print(f"  output/ascii/dungeon_{num}.txt")
+    for subdir in ("graph", "ascii"):
+        Path("output", subdir).mkdir(parents=True, exist_ok=True)
+
+    with ProcessPoolExecutor(initializer=_use_agg) as executor:
+        for num, ascii_grid in executor.map(_generate, range(1, NUM_EXAMPLES + 1)):
+            if ascii_grid:
+                with open(f"output/ascii/dungeon_{num}.txt", "w") as f:
+                    f.write(ascii_grid)
+                print(f"  output/ascii/dungeon_{num}.txt")
 
     print()
     print("Done!")
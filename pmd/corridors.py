@@ -3,47 +3,51 @@
 
 from typing import List, Dict, Tuple
 
+import numpy as np
+
 from placement import PlacedRoom
 
 
-def bresenham_path(start: Tuple[int, int], end: Tuple[int, int]) -> List[Tuple[int, int]]:
-    """Bresenham's line algorithm - cardinal-only steps."""
+def bresenham_path(start: Tuple[int, int], end: Tuple[int, int]) -> np.ndarray:
+    """Bresenham's line algorithm - cardinal-only steps, as an (n, 2) tile array."""
     x1, y1 = start
     x2, y2 = end
-    path = [(x1, y1)]
-
     dx = abs(x2 - x1)
     dy = abs(y2 - y1)
     sx = 1 if x2 > x1 else -1
     sy = 1 if y2 > y1 else -1
-    err = dx - dy
-    x, y = x1, y1
-
-    while x != x2 or y != y2:
-        e2 = 2 * err
-        if e2 > -dy and (e2 < dx and dx > dy or e2 >= dx):
-            err -= dy
-            x += sx
-        elif e2 < dx:
-            err += dx
-            y += sy
-        elif e2 > -dy:
-            err -= dy
-            x += sx
-        path.append((x, y))
 
+    if dx and dy:
+        # Each axis steps when its error crosses a half tile; merging both axes'
+        # crossing times (scaled by 2*dx*dy) orders all dx + dy steps at once.
+        crossings = np.concatenate(((2 * np.arange(dx) + 1) * dy, (2 * np.arange(dy) + 1) * dx))
+        x_steps = np.argsort(crossings, kind="stable") < dx
+    else:
+        x_steps = np.full(dx + dy, dy == 0)
+
+    path = np.empty((dx + dy + 1, 2), dtype=np.int32)
+    path[0] = start
+    path[1:, 0] = x1 + sx * np.cumsum(x_steps)
+    path[1:, 1] = y1 + sy * np.cumsum(~x_steps)
     return path
 
 
 def calculate_corridors(placed_rooms: Dict[int, PlacedRoom],
-                        connections: List[Tuple[int, int]]) -> List[List[Tuple[int, int]]]:
-    """Calculate corridor paths between connected rooms."""
+                        connections: List[Tuple[int, int]]) -> Tuple[np.ndarray, np.ndarray]:
+    """Calculate corridor paths between connected rooms.
+
+    Returns every path tile as one (n, 2) array plus offsets: corridor i
+    is tiles[offsets[i]:offsets[i + 1]].
+    """
+    index = {rid: i for i, rid in enumerate(placed_rooms)}
+    centers = np.array([(r.x + r.width // 2, r.y + r.height // 2) for r in placed_rooms.values()],
+                       dtype=np.int32)
+
     corridor_paths = []
     for r1_id, r2_id in connections:
-        if r1_id not in placed_rooms or r2_id not in placed_rooms:
+        if r1_id not in index or r2_id not in index:
             continue
-        r1, r2 = placed_rooms[r1_id], placed_rooms[r2_id]
-        start = (r1.x + r1.width // 2, r1.y + r1.height // 2)
-        end = (r2.x + r2.width // 2, r2.y + r2.height // 2)
-        corridor_paths.append(bresenham_path(start, end))
-    return corridor_paths
+        corridor_paths.append(bresenham_path(centers[index[r1_id]], centers[index[r2_id]]))
+
+    offsets = np.cumsum([0] + [len(path) for path in corridor_paths])
+    return np.concatenate([np.empty((0, 2), dtype=np.int32), *corridor_paths]), offsets
@@ -3,6 +3,9 @@
 
 from typing import List, Dict, Tuple
 from dataclasses import dataclass
+from functools import cached_property
+
+import numpy as np
 
 from topology import generate_topology, Topology
 from placement import place_rooms, PlacedRoom
@@ -14,16 +17,17 @@ class Dungeon:
     """Complete calculated dungeon."""
     rooms: Dict[int, PlacedRoom]
     connections: List[Tuple[int, int]]
-    corridor_tiles: List[List[Tuple[int, int]]]
+    corridor_tiles: np.ndarray  # (n, 2) tiles of every corridor, back to back
+    corridor_offsets: np.ndarray  # Corridor i is corridor_tiles[offsets[i]:offsets[i + 1]]
     item_types: Dict[int, str]
     enemy_types: Dict[int, str]
     trap_types: Dict[int, str]
 
-    @property
+    @cached_property
     def width(self) -> int:
         return max(r.x + r.width for r in self.rooms.values()) + 1
 
-    @property
+    @cached_property
     def height(self) -> int:
         return max(r.y + r.height for r in self.rooms.values()) + 1
 
@@ -35,16 +39,22 @@ def generate_dungeon(num_rooms: int = 7, min_gap: int = 2) -> Dungeon:
     if topology is None:
         return None
 
+    return build_dungeon(topology, min_gap)
+
+
+def build_dungeon(topology: Topology, min_gap: int = 2) -> Dungeon:
+    """Run the placement and corridor stages for an existing topology."""
     # Stage 2: Physics placement
     placed = place_rooms(topology, min_gap)
 
     # Stage 3: Corridor calculation
-    corridor_tiles = calculate_corridors(placed, topology.connections)
+    corridor_tiles, corridor_offsets = calculate_corridors(placed, topology.connections)
 
     return Dungeon(
         rooms=placed,
         connections=topology.connections,
         corridor_tiles=corridor_tiles,
+        corridor_offsets=corridor_offsets,
         item_types=topology.item_types,
         enemy_types=topology.enemy_types,
         trap_types=topology.trap_types,
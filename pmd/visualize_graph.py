@@ -1,80 +1,83 @@
 #!/usr/bin/env python3
 """Visualize dungeon topology as a graph."""
 
+import io
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from typing import List
 
 sys.path.insert(0, str(Path(__file__).parent))
 
-import networkx as nx
-import matplotlib.pyplot as plt
-from topology import generate_topology, Topology
+import numpy as np
 
+from topology import generate_topology, Room, Topology
 
-def visualize_graph(topology: Topology, output_file: str = "pmd_graph.png"):
-    """Create a graph visualization of room topology."""
+MAX_LABELED_GRID = 16  # Larger grids skip the per-cell coordinate labels
+PNG_COLORS = 64  # Palette size for saved graphs; they only use a handful of flat colors
+
+
+def _room_label(room: Room) -> str:
+    """Node label: id, grid cell, size, role and content counts."""
+    content = ", ".join(f"{len(ids)} {kind}" for kind, ids in
+                        (("items", room.items), ("enemies", room.enemies), ("traps", room.traps)) if ids)
+    return (f"R{room.id}\n({room.gx},{room.gy})\n{room.width}x{room.height}"
+            + ("\nSPAWN" if room.is_spawn else "") + ("\nSTAIRS" if room.is_stairs else "")
+            + (f"\n{content}" if content else ""))
+
+
+def visualize_graph(topology: Topology, output_file: str = "pmd_graph.png", ax=None):
+    """Create a graph visualization of room topology.
+
+    Pass ax to redraw into an existing figure instead of creating one per call.
+    """
     if topology is None:
         print("No topology to visualize")
         return None
 
-    G = nx.Graph()
-    for rid in topology.rooms:
-        G.add_node(rid)
-    for r1, r2 in topology.connections:
-        G.add_edge(r1, r2)
+    # Plotting libraries are slow to import; only pay for them when drawing
+    import matplotlib.pyplot as plt
+    from matplotlib.collections import LineCollection, PatchCollection
+    from matplotlib.patches import Patch, Rectangle
+    from PIL import Image
 
-    fig, ax = plt.subplots(1, 1, figsize=(12, 10))
+    owns_figure = ax is None
+    if owns_figure:
+        fig, ax = plt.subplots(1, 1, figsize=(12, 10))
+    else:
+        fig = ax.figure
+        ax.cla()
 
     # Position rooms at grid coordinates
-    pos = {rid: (room.gx, room.gy) for rid, room in topology.rooms.items()}
-
-    # Draw background grid
-    for i in range(topology.grid_size):
-        for j in range(topology.grid_size):
-            rect = plt.Rectangle((i - 0.45, j - 0.45), 0.9, 0.9,
-                                  fill=False, edgecolor='#ddd', linewidth=1, linestyle='--')
-            ax.add_patch(rect)
-            ax.text(i - 0.4, j - 0.35, f"({i},{j})", fontsize=7, color='#aaa', ha='left', va='bottom')
-
-    # Node colors
-    node_colors = []
-    for rid in G.nodes():
-        room = topology.rooms[rid]
-        if room.is_spawn:
-            node_colors.append("#4CAF50")
-        elif room.is_stairs:
-            node_colors.append("#FF9800")
-        else:
-            node_colors.append("#2196F3")
-
-    nx.draw_networkx_edges(G, pos, ax=ax, edge_color='#888', width=2, alpha=0.7)
-    nx.draw_networkx_nodes(G, pos, ax=ax, node_color=node_colors, node_size=2500, alpha=0.9)
+    index = {rid: i for i, rid in enumerate(topology.rooms)}
+    pos = np.array([(room.gx, room.gy) for room in topology.rooms.values()], dtype=float)
+
+    # Draw background grid as a single collection
+    cells = range(topology.grid_size)
+    ax.add_collection(PatchCollection([Rectangle((i - 0.45, j - 0.45), 0.9, 0.9) for i in cells for j in cells],
+                                      facecolor='none', edgecolor='#ddd', linewidth=1, linestyle='--'))
+    if topology.grid_size <= MAX_LABELED_GRID:
+        for i in cells:
+            for j in cells:
+                ax.text(i - 0.4, j - 0.35, f"({i},{j})", fontsize=7, color='#aaa', ha='left', va='bottom')
+
+    # Node colors; spawn wins over stairs
+    rooms = topology.rooms.values()
+    spawn = np.fromiter((room.is_spawn for room in rooms), bool, len(rooms))
+    stairs = np.fromiter((room.is_stairs for room in rooms), bool, len(rooms))
+    node_colors = np.select([spawn, stairs], ["#4CAF50", "#FF9800"], "#2196F3")
+
+    edges = np.array([(index[r1], index[r2]) for r1, r2 in topology.connections], dtype=int).reshape(-1, 2)
+    ax.add_collection(LineCollection(pos[edges], colors='#888', linewidths=2, alpha=0.7, zorder=1))
+    ax.scatter(pos[:, 0], pos[:, 1], s=2500, c=node_colors, alpha=0.9, zorder=2)
 
     # Labels
-    labels = {}
-    for rid, room in topology.rooms.items():
-        lines = [f"R{rid}", f"({room.gx},{room.gy})", f"{room.width}x{room.height}"]
-        if room.is_spawn:
-            lines.append("SPAWN")
-        if room.is_stairs:
-            lines.append("STAIRS")
-        content = []
-        if room.items:
-            content.append(f"{len(room.items)} items")
-        if room.enemies:
-            content.append(f"{len(room.enemies)} enemies")
-        if room.traps:
-            content.append(f"{len(room.traps)} traps")
-        if content:
-            lines.append(", ".join(content))
-        labels[rid] = "\n".join(lines)
-
-    nx.draw_networkx_labels(G, pos, labels, ax=ax, font_size=8, font_weight='bold')
+    for i, room in enumerate(rooms):
+        ax.text(*pos[i], _room_label(room), fontsize=8, fontweight='bold', ha='center', va='center', clip_on=True)
 
     ax.set_title(f"Dungeon Graph\n{len(topology.rooms)} rooms, {len(topology.connections)} corridors",
                 fontsize=14, fontweight="bold")
 
-    from matplotlib.patches import Patch
     legend_elements = [
         Patch(facecolor='#4CAF50', label='Spawn'),
         Patch(facecolor='#FF9800', label='Stairs'),
@@ -86,14 +89,37 @@ def visualize_graph(topology: Topology, output_file: str = "pmd_graph.png"):
     ax.set_ylim(-0.6, topology.grid_size - 0.4)
     ax.set_aspect('equal')
     ax.axis('off')
-    plt.tight_layout()
-    plt.savefig(output_file, dpi=150, bbox_inches='tight', facecolor='white')
-    plt.close()
+    try:
+        fig.tight_layout()
+        if Path(output_file).suffix.lower() in (".png", ""):
+            # Render once in memory, then store a paletted PNG a fraction of the RGBA size
+            buf = io.BytesIO()
+            fig.savefig(buf, format='png', dpi=150, bbox_inches='tight', facecolor='white')
+            buf.seek(0)
+            image = Image.open(buf).convert('RGB').quantize(colors=PNG_COLORS, method=Image.Quantize.FASTOCTREE)
+            image.save(output_file, format='PNG', optimize=True)
+        else:
+            fig.savefig(output_file, dpi=150, bbox_inches='tight', facecolor='white')
+    finally:
+        if owns_figure:
+            plt.close(fig)
 
     print(f"Saved to {output_file}")
     return output_file
 
 
+def _use_agg():
+    """Worker initializer: render off-screen whatever the default backend is."""
+    import matplotlib
+    matplotlib.use("Agg")
+
+
+def render_many(topologies: List[Topology], output_files: List[str]) -> List[str]:
+    """Render several topologies to PNGs in parallel worker processes."""
+    with ProcessPoolExecutor(initializer=_use_agg) as executor:
+        return list(executor.map(visualize_graph, topologies, output_files))
+
+
 if __name__ == "__main__":
     num_rooms = int(sys.argv[1]) if len(sys.argv) > 1 else 7
     output = sys.argv[2] if len(sys.argv) > 2 else "pmd_graph.png"